@@ -1,18 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import gzip
+import hashlib
+import json
 import os
+import re
+import shutil
+import stat
+import time
 import uuid
+from datetime import datetime, timezone
+from email.utils import formatdate
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from fastapi import FastAPI, File, UploadFile, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.staticfiles import NotModifiedResponse
 from fastapi.templating import Jinja2Templates
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
 
-from logtool.schema import load_log, map_columns, basic_cleanup
-from logtool.segments import detect_wot_pulls, detect_steady_cruise, slice_segment
-from logtool.report import make_reports, export_json, plot_segment
+from logtool.schema import FK8_COBB_MAP, load_log, map_columns, basic_cleanup
+from logtool.segments import detect_wot_pulls, detect_steady_cruise, rpm_slope
+from logtool.report import PLOT_SUFFIXES, make_reports, export_json, plot_segments
 
 APP_DIR = Path(__file__).resolve().parent
 TEMPLATES = Jinja2Templates(directory=str(APP_DIR / "templates"))
@@ -27,41 +41,122 @@ RUNS_DIR.mkdir(parents=True, exist_ok=True)
 # Share links remain accessible without the key.
 APP_ACCESS_KEY = os.environ.get("LOGTOOL_ACCESS_KEY", "").strip()
 
+# Set LOGTOOL_SERVE_RUNS=0 when a reverse proxy serves RUNS_DIR at /runs (see README).
+SERVE_RUNS = os.environ.get("LOGTOOL_SERVE_RUNS", "1").strip() != "0"
+
+_IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+# report.json above this size is stored gzipped as report.json.gz
+_GZIP_REPORT_OVER = 16384
+
+# Plot file names look like segment_<n>_<KIND>_<suffix>.png
+_PLOT_RE = re.compile(r"segment_(\d+)_([A-Z_]+).*\.png$")
+
+# _clean_old_runs is called on every request; only walk RUNS_DIR this often.
+_CLEANUP_INTERVAL_S = 60.0
+_last_cleanup_ts = 0.0
+
 def _clean_old_runs(days: int = 7) -> None:
     """Best-effort cleanup of old run folders."""
+    global _last_cleanup_ts
+    now = time.time()
+    if now - _last_cleanup_ts < _CLEANUP_INTERVAL_S:
+        return
+    _last_cleanup_ts = now
     try:
-        import time
-        cutoff = time.time() - days * 86400
-        for d in RUNS_DIR.iterdir():
-            if not d.is_dir():
-                continue
-            try:
-                if d.stat().st_mtime < cutoff:
-                    # delete files
-                    for p in d.rglob("*"):
-                        if p.is_file():
-                            p.unlink(missing_ok=True)
-                    # delete dirs bottom-up
-                    for p in sorted([p for p in d.rglob("*") if p.is_dir()], reverse=True):
-                        try:
-                            p.rmdir()
-                        except Exception:
-                            pass
-                    try:
-                        d.rmdir()
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+        cutoff = now - days * 86400
+        with os.scandir(RUNS_DIR) as it:
+            for d in it:
+                try:
+                    if d.is_dir() and d.stat().st_mtime < cutoff:
+                        shutil.rmtree(d.path, ignore_errors=True)
+                except Exception:
+                    pass
     except Exception:
         pass
 
+def _save_upload(file: UploadFile, dest: Path) -> None:
+    """Copy the spooled upload to disk in 1 MiB chunks instead of reading it whole."""
+    file.file.seek(0)
+    with open(dest, "wb") as f:
+        shutil.copyfileobj(file.file, f, length=1 << 20)
+
+def _render_plots(df, segs, run_dir: Path, run_dirname: str) -> list[dict]:
+    """Write per-segment PNGs into run_dir and return plot entries for the templates."""
+    outbases = [run_dir / f"segment_{i}_{seg.kind}.png" for i, seg in enumerate(segs, start=1)]
+    plot_segments(df, segs, [str(p) for p in outbases])
+
+    plots = []
+    for i, (seg, outbase) in enumerate(zip(segs, outbases), start=1):
+        for suf in PLOT_SUFFIXES:
+            p = run_dir / (outbase.name.replace(".png", suf))
+            if p.exists():
+                plots.append({"segment": i, "kind": seg.kind, "name": p.name, "url": f"/runs/{run_dirname}/{p.name}"})
+    return plots
+
+def _find_report(run_dir: Path) -> Path | None:
+    """report.json, or report.json.gz for large reports."""
+    for name in ("report.json.gz", "report.json"):
+        p = run_dir / name
+        if p.exists():
+            return p
+    return None
+
+def _read_report(path: Path) -> bytes:
+    data = path.read_bytes()
+    return gzip.decompress(data) if path.suffix == ".gz" else data
+
+class _ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles for run folders. Responses are marked immutable (folders are uuid-named
+    and written once), and a missing X.json is served from X.json.gz if that exists.
+    """
+    def file_response(self, full_path, *args, **kwargs):
+        response = super().file_response(full_path, *args, **kwargs)
+        response.headers["Cache-Control"] = _IMMUTABLE_CACHE
+        if str(full_path).endswith(".gz"):
+            # a direct .gz download is a gzip file; mimetypes would label report.json.gz as JSON
+            response.headers["Content-Type"] = "application/gzip"
+        return response
+
+    async def get_response(self, path: str, scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as exc:
+            if exc.status_code != 404 or not path.endswith(".json"):
+                raise
+        full_path, stat_result = await asyncio.to_thread(self.lookup_path, path + ".gz")
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404)
+        request_headers = Headers(scope=scope)
+        if "gzip" not in request_headers.get("accept-encoding", ""):
+            # Decompressed copy of the .gz: validators come from the .gz stat, with an ETag
+            # distinct from the gzip-encoded representation of the same URL.
+            etag_base = f"{stat_result.st_mtime}-{stat_result.st_size}-identity"
+            headers = {
+                "Cache-Control": _IMMUTABLE_CACHE,
+                "ETag": f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"',
+                "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+                "Vary": "Accept-Encoding",
+            }
+            if self.is_not_modified(Headers(headers), request_headers):
+                return NotModifiedResponse(Headers(headers))
+            body = await asyncio.to_thread(_read_report, Path(full_path))
+            return Response(body, media_type="application/json", headers=headers)
+        response = self.file_response(full_path, stat_result, scope)
+        response.headers["Content-Type"] = "application/json"
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
 app = FastAPI(title="FK8 Cobb Log Tool")
 
 # Serve static PWA assets
 app.mount("/static", StaticFiles(directory=str(APP_DIR / "static")), name="static")
-# Serve run artifacts (plots/json). Directory names include a random share token.
-app.mount("/runs", StaticFiles(directory=str(RUNS_DIR)), name="runs")
+# Serve run artifacts (plots/json). Directory names are random uuid4 hex.
+# StaticFiles already sends ETag/Last-Modified and answers conditional GETs with 304.
+if SERVE_RUNS:
+    app.mount("/runs", _ImmutableStaticFiles(directory=str(RUNS_DIR)), name="runs")
 
 @app.get("/", response_class=HTMLResponse)
 def index(request: Request):
@@ -94,25 +189,26 @@ async def analyze(
             status_code=400,
         )
 
-    run_id = uuid.uuid4().hex  # 32 chars
-    share_token = uuid.uuid4().hex  # separate token for sharing
-    run_dirname = f"{run_id}_{share_token}"
+    # One uuid4 (122 random bits) is the run id and the unguessable share token.
+    # Older runs named "<run_id>_<share_token>" are still served as-is.
+    run_dirname = uuid.uuid4().hex
     run_dir = RUNS_DIR / run_dirname
     run_dir.mkdir(parents=True, exist_ok=True)
 
     upload_path = UPLOAD_DIR / f"{run_dirname}{ext}"
-    with open(upload_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    await asyncio.to_thread(_save_upload, file, upload_path)
 
-    raw = load_log(str(upload_path))
-    mapped = map_columns(raw)
-    df = basic_cleanup(mapped.df)
+    # pandas/matplotlib work is CPU-bound; keep it off the event loop so other
+    # requests (/, /share, static assets) are served while a log is analyzed.
+    raw = await asyncio.to_thread(load_log, str(upload_path), FK8_COBB_MAP)
+    mapped = await asyncio.to_thread(map_columns, raw)
+    df = await asyncio.to_thread(basic_cleanup, mapped.df)
 
+    slope = await asyncio.to_thread(rpm_slope, df)
     segs = []
-    segs.extend(detect_wot_pulls(df))
+    segs.extend(await asyncio.to_thread(detect_wot_pulls, df, slope=slope))
     if include_cruise:
-        segs.extend(detect_steady_cruise(df))
+        segs.extend(await asyncio.to_thread(detect_steady_cruise, df, slope=slope))
     segs = sorted(segs, key=lambda s: s.start_idx)
 
     if not segs:
@@ -132,38 +228,28 @@ async def analyze(
             status_code=200,
         )
 
-    reports = make_reports(df, segs)
-
-    plots = []
-    for i, seg in enumerate(segs, start=1):
-        seg_df = slice_segment(df, seg)
-        outbase = run_dir / f"segment_{i}_{seg.kind}.png"
-        plot_segment(seg_df, str(outbase))
-        suffixes = ["_boost.png", "_emp_boost.png", "_emp_ratio_vs_rpm.png", "_frp.png", "_throttle.png"]
-        for suf in suffixes:
-            p = run_dir / (outbase.name.replace(".png", suf))
-            if p.exists():
-                plots.append({"segment": i, "kind": seg.kind, "name": p.name, "url": f"/runs/{run_dirname}/{p.name}"})
+    reports = await asyncio.to_thread(make_reports, df, segs)
+    plots = await asyncio.to_thread(_render_plots, df, segs, run_dir, run_dirname)
 
     report_json_path = run_dir / "report.json"
-    export_json(reports, str(report_json_path))
+    await asyncio.to_thread(export_json, reports, str(report_json_path), _GZIP_REPORT_OVER)
 
     # Save minimal metadata
     meta = {
-        "created_utc": __import__("datetime").datetime.utcnow().isoformat() + "Z",
+        "created_utc": datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + "Z",
         "filename": filename,
         "missing": mapped.missing,
         "include_cruise": bool(include_cruise),
     }
-    import json
     (run_dir / "meta.json").write_text(json.dumps(meta, indent=2))
 
+    time_arr = df["time_s"].to_numpy()
+    rpm_arr = df["rpm"].to_numpy()
     view_segments = []
     for i, rep in enumerate(reports, start=1):
         seg = rep.segment
-        seg_df = df.iloc[seg.start_idx:seg.end_idx+1]
-        t0, t1 = float(seg_df["time_s"].iloc[0]), float(seg_df["time_s"].iloc[-1])
-        r0, r1 = float(seg_df["rpm"].iloc[0]), float(seg_df["rpm"].iloc[-1])
+        t0, t1 = float(time_arr[seg.start_idx]), float(time_arr[seg.end_idx])
+        r0, r1 = float(rpm_arr[seg.start_idx]), float(rpm_arr[seg.end_idx])
         view_segments.append({
             "idx": i,
             "kind": seg.kind,
@@ -192,19 +278,14 @@ async def analyze(
         status_code=200,
     )
 
-@app.get("/share/{run_dirname}", response_class=HTMLResponse)
-def share(request: Request, run_dirname: str):
-    _clean_old_runs()
-    run_dir = (RUNS_DIR / run_dirname).resolve()
-    if not run_dir.exists() or not str(run_dir).startswith(str(RUNS_DIR.resolve())):
-        return RedirectResponse(url="/", status_code=302)
-
-    report_path = run_dir / "report.json"
-    if not report_path.exists():
-        return RedirectResponse(url="/", status_code=302)
-
-    import json
-    payload = json.loads(report_path.read_text())
+@lru_cache(maxsize=256)
+def _load_share_payload(run_dirname: str, mtime_ns: int) -> dict:
+    """
+    Parse report.json(.gz)/meta.json and list plots for a run.
+    mtime_ns is part of the cache key so a regenerated report is re-read.
+    """
+    run_dir = RUNS_DIR / run_dirname
+    payload = json.loads(_read_report(_find_report(run_dir)))
     segments = []
     for idx, seg in enumerate(payload, start=1):
         # convert dicts into simple objects for Jinja template attribute access
@@ -218,12 +299,13 @@ def share(request: Request, run_dirname: str):
         })
 
     plots = []
-    import re
-    for p in sorted(run_dir.glob("*.png")):
-        m = re.match(r"segment_(\d+)_([A-Z_]+).*\.png$", p.name)
+    with os.scandir(run_dir) as it:
+        png_names = sorted(e.name for e in it if e.name.endswith(".png"))
+    for name in png_names:
+        m = _PLOT_RE.match(name)
         seg_n = int(m.group(1)) if m else 0
         kind = m.group(2) if m else ""
-        plots.append({"segment": seg_n, "kind": kind, "name": p.name, "url": f"/runs/{run_dirname}/{p.name}"})
+        plots.append({"segment": seg_n, "kind": kind, "name": name, "url": f"/runs/{run_dirname}/{name}"})
 
     # filename from meta if present
     filename = "log"
@@ -235,14 +317,29 @@ def share(request: Request, run_dirname: str):
         except Exception:
             pass
 
+    return {"segments": segments, "plots": plots, "filename": filename}
+
+@app.get("/share/{run_dirname}", response_class=HTMLResponse)
+def share(request: Request, run_dirname: str):
+    _clean_old_runs()
+    run_dir = (RUNS_DIR / run_dirname).resolve()
+    if not run_dir.exists() or not str(run_dir).startswith(str(RUNS_DIR.resolve())):
+        return RedirectResponse(url="/", status_code=302)
+
+    report_path = _find_report(run_dir)
+    if report_path is None:
+        return RedirectResponse(url="/", status_code=302)
+
+    payload = _load_share_payload(run_dirname, report_path.stat().st_mtime_ns)
+
     return TEMPLATES.TemplateResponse(
         "share.html",
         {
             "request": request,
-            "filename": filename,
+            "filename": payload["filename"],
             "run_dirname": run_dirname,
-            "segments": segments,
-            "plots": plots,
+            "segments": payload["segments"],
+            "plots": payload["plots"],
             "report_json_url": f"/runs/{run_dirname}/report.json",
         },
         status_code=200,
@@ -2,9 +2,9 @@ from __future__ import annotations
 import argparse
 import os
 
-from .schema import load_log, map_columns, basic_cleanup
-from .segments import detect_wot_pulls, detect_steady_cruise, slice_segment
-from .report import make_reports, print_reports, plot_segment, export_json
+from .schema import FK8_COBB_MAP, load_log, map_columns, basic_cleanup
+from .segments import detect_wot_pulls, detect_steady_cruise, rpm_slope
+from .report import make_reports, print_reports, plot_segments, export_json
 
 def main():
     ap = argparse.ArgumentParser(prog="logtool", description="FK8 Cobb AP log analyzer (starter).")
@@ -15,7 +15,7 @@ def main():
     ap.add_argument("--json", action="store_true", help="Also write a machine-readable JSON report to outdir/report.json.")
     args = ap.parse_args()
 
-    raw = load_log(args.path)
+    raw = load_log(args.path, FK8_COBB_MAP)
     mapped = map_columns(raw)
     df = basic_cleanup(mapped.df)
 
@@ -24,10 +24,11 @@ def main():
         for m in mapped.missing:
             print("  -", m)
 
+    slope = rpm_slope(df)
     segs = []
-    segs.extend(detect_wot_pulls(df))
+    segs.extend(detect_wot_pulls(df, slope=slope))
     if args.include_cruise:
-        segs.extend(detect_steady_cruise(df))
+        segs.extend(detect_steady_cruise(df, slope=slope))
 
     if not segs:
         print("No segments detected. Try lowering thresholds in segments.py or verify app_pct/rpm logging.")
@@ -42,15 +43,13 @@ def main():
         os.makedirs(args.outdir, exist_ok=True)
 
     if args.plots:
-        for i, seg in enumerate(segs, start=1):
-            seg_df = slice_segment(df, seg)
-            outbase = os.path.join(args.outdir, f"segment_{i}_{seg.kind}.png")
-            plot_segment(seg_df, outbase)
+        outbases = [os.path.join(args.outdir, f"segment_{i}_{seg.kind}.png") for i, seg in enumerate(segs, start=1)]
+        plot_segments(df, segs, outbases)
         print(f"\nPlots written to: {args.outdir}/")
 
     if args.json:
         outpath = os.path.join(args.outdir, "report.json")
-        export_json(reports, outpath)
+        outpath = export_json(reports, outpath)
         print(f"JSON report written to: {outpath}")
 
 if __name__ == "__main__":
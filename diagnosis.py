@@ -10,15 +10,6 @@ class RankedCause:
     rationale: str
     next_steps: list[str]
 
-def _has(code: str, findings) -> bool:
-    return any(f.code == code for f in findings)
-
-def _get(code: str, findings):
-    for f in findings:
-        if f.code == code:
-            return f
-    return None
-
 def rank_causes_wot(seg: pd.DataFrame, findings) -> list[RankedCause]:
     """
     Lightweight, explainable scorer that converts findings + a few signals into:
@@ -27,6 +18,9 @@ def rank_causes_wot(seg: pd.DataFrame, findings) -> list[RankedCause]:
 
     This is intentionally heuristic (v1). As you label cases, you can replace this with ML.
     """
+    # Index findings by code once; the first finding for a code wins.
+    by_code = {f.code: f for f in reversed(findings)}
+
     scores = {
         "torque_or_traction_limiting": 0.0,
         "turbo_component_protection_limiting": 0.0,
@@ -38,34 +32,34 @@ def rank_causes_wot(seg: pd.DataFrame, findings) -> list[RankedCause]:
     }
 
     # Base: underboost present?
-    under = _get("UNDERBOOST", findings)
+    under = by_code.get("UNDERBOOST")
     if under:
         for k in scores:
             scores[k] += 0.5
 
     # Throttle closure points strongly to limiters
-    if _has("THROTTLE_CLOSURE", findings):
+    if "THROTTLE_CLOSURE" in by_code:
         scores["torque_or_traction_limiting"] += 4.0
-    if _has("THROTTLE_OK", findings) and under:
+    if "THROTTLE_OK" in by_code and under:
         scores["torque_or_traction_limiting"] -= 1.0
 
     # Component protection
-    if _has("COMP_PROTECT", findings):
+    if "COMP_PROTECT" in by_code:
         scores["turbo_component_protection_limiting"] += 4.0
 
     # Fueling
-    frp = _get("FRP_DROP", findings)
+    frp = by_code.get("FRP_DROP")
     if frp:
         scores["fueling_system_limit"] += 3.0
-    if _has("HPFP_AT_LIMIT", findings):
+    if "HPFP_AT_LIMIT" in by_code:
         scores["fueling_system_limit"] += 2.0
-    if _has("AFR_MISS", findings):
+    if "AFR_MISS" in by_code:
         scores["fueling_system_limit"] += 1.5
-    if _has("FRP_OK", findings) and _has("AFR_OK", findings):
+    if "FRP_OK" in by_code and "AFR_OK" in by_code:
         scores["fueling_system_limit"] -= 1.0
 
     # EMP ratio — high implies turbine choking / restriction / pre-turb issues
-    emp = _get("EMP_RATIO", findings)
+    emp = by_code.get("EMP_RATIO")
     if emp:
         ratio = emp.evidence.get("emp_boost_gauge_ratio_median")
         if ratio is not None:
@@ -81,7 +75,7 @@ def rank_causes_wot(seg: pd.DataFrame, findings) -> list[RankedCause]:
                 scores["boost_leak_post_turbo"] += 1.0
 
     # Wastegate saturation hints
-    if _has("WG_SAT_CLOSED", findings) and under:
+    if "WG_SAT_CLOSED" in by_code and under:
         # Gate "closed" yet still underboosting: flow ceiling/leak
         scores["turbine_choking_or_exhaust_restriction"] += 1.2
         scores["boost_leak_post_turbo"] += 1.2
@@ -89,7 +83,7 @@ def rank_causes_wot(seg: pd.DataFrame, findings) -> list[RankedCause]:
         scores["wastegate_mechanical_or_control_issue"] -= 0.5
 
     # WG polarity uncertain / control issue bucket
-    if _has("WG_POLARITY_UNCERTAIN", findings):
+    if "WG_POLARITY_UNCERTAIN" in by_code:
         scores["wastegate_mechanical_or_control_issue"] += 2.5
 
     # Use a small additional signal: pre-throttle vs MAP (helps separate throttle/restriction/leak a bit)
@@ -155,80 +149,29 @@ def rank_causes_wot(seg: pd.DataFrame, findings) -> list[RankedCause]:
             ]
         return ["Re-log with consistent conditions and add any missing monitors relevant to this hypothesis."]
 
-    # Build rationales from the findings
-    for cause, score in out[:3]:
-        rationale_bits = []
-        if under:
-            rationale_bits.append("Underboost is present.")
-        if cause == "torque_or_traction_limiting" and _has("THROTTLE_CLOSURE", findings):
-            rationale_bits.append("Throttle closes during WOT (classic limiter/traction pattern).")
-        if cause == "turbo_component_protection_limiting" and _has("COMP_PROTECT", findings):
-            rationale_bits.append("Component protection ceiling sits below target for part of the pull.")
-        if cause == "turbine_choking_or_exhaust_restriction" and emp:
-            rationale_bits.append("EMP:Boost ratio is elevated.")
-        if cause in ("boost_leak_post_turbo","pre_turbine_exhaust_leak") and _has("WG_SAT_CLOSED", findings):
-            rationale_bits.append("WG appears near 'closed' extreme yet boost target is missed (points to leaks/flow ceiling).")
-        if cause == "fueling_system_limit" and (frp or _has("AFR_MISS", findings)):
-            rationale_bits.append("Fuel pressure/AFR tracking indicates potential fueling headroom issues.")
-        if cause == "wastegate_mechanical_or_control_issue" and _has("WG_POLARITY_UNCERTAIN", findings):
-            rationale_bits.append("WG position semantics look inconsistent; control/interpretation needs verification.")
-        rationale = " ".join(rationale_bits) if rationale_bits else "Scored by heuristic signals from this pull."
-
-        out_obj = RankedCause(
-            cause=cause,
-            score=score,
-            rationale=rationale,
-            next_steps=steps_for(cause)
-        )
-        # Only keep meaningful entries
-        if score >= 1.0:
-            return_list = []
-    # Return all causes with score >=1, capped at 5
+    # Rationale shared by the top causes (built from this pull's findings)
+    rationale_bits = []
+    if under:
+        rationale_bits.append("Underboost is present.")
+    if "THROTTLE_CLOSURE" in by_code:
+        rationale_bits.append("Throttle closure detected.")
+    if "COMP_PROTECT" in by_code:
+        rationale_bits.append("Component protection indicated.")
+    if emp:
+        r = emp.evidence.get("emp_boost_gauge_ratio_median")
+        if r is not None:
+            rationale_bits.append(f"EMP:Boost≈{r:.2f}.")
+    if "WG_SAT_CLOSED" in by_code:
+        rationale_bits.append("WG near closed extreme during underboost.")
+    if frp:
+        rationale_bits.append("FRP shortfall present.")
+    detailed = " ".join(rationale_bits) if rationale_bits else "Scored by heuristic signals from this pull."
+
+    # Return all causes with score >=1, capped at 5; the top 3 get the detailed rationale
     ranked = []
     for cause, score in out:
-        if score >= 1.0:
-            ranked.append(RankedCause(cause=cause, score=score, rationale="Scored by heuristic signals.", next_steps=steps_for(cause)))
-        if len(ranked) >= 5:
+        if score < 1.0 or len(ranked) >= 5:
             break
-
-    # Improve rationale for top 3
-    for i in range(min(3, len(ranked))):
-        cause = ranked[i].cause
-        # reuse detailed rationale
-        ranked[i] = RankedCause(cause=cause, score=ranked[i].score, rationale=rank_causes_wot(seg, findings=[])[0].rationale if False else ranked[i].rationale, next_steps=ranked[i].next_steps)
-    # overwrite top-3 with detailed ones computed above
-    detailed_top3 = []
-    for cause, score in out[:3]:
-        if score < 1.0:
-            continue
-        rationale_bits = []
-        if under:
-            rationale_bits.append("Underboost is present.")
-        if _has("THROTTLE_CLOSURE", findings):
-            rationale_bits.append("Throttle closure detected.")
-        if _has("COMP_PROTECT", findings):
-            rationale_bits.append("Component protection indicated.")
-        empf = emp
-        if empf:
-            r = empf.evidence.get("emp_boost_gauge_ratio_median")
-            if r is not None:
-                rationale_bits.append(f"EMP:Boost≈{r:.2f}.")
-        if _has("WG_SAT_CLOSED", findings):
-            rationale_bits.append("WG near closed extreme during underboost.")
-        if frp:
-            rationale_bits.append("FRP shortfall present.")
-        rationale = " ".join(rationale_bits) if rationale_bits else "Scored by heuristic signals from this pull."
-        detailed_top3.append(RankedCause(cause=cause, score=score, rationale=rationale, next_steps=steps_for(cause)))
-    # Replace beginning of ranked list with detailed
-    if detailed_top3:
-        # keep unique order
-        seen=set()
-        merged=[]
-        for rc in detailed_top3 + ranked:
-            if rc.cause in seen: 
-                continue
-            seen.add(rc.cause)
-            merged.append(rc)
-        ranked = merged[:5]
-
+        rationale = detailed if len(ranked) < 3 else "Scored by heuristic signals."
+        ranked.append(RankedCause(cause=cause, score=score, rationale=rationale, next_steps=steps_for(cause)))
     return ranked
@@ -1,15 +1,66 @@
 from __future__ import annotations
 import os
-import json
+import gzip
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, asdict
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import orjson
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 from .segments import Segment, slice_segment
 from .rules import run_wot_rules, run_cruise_rules
 from .diagnosis import rank_causes_wot
 
+PLOT_DPI = 110
+# Plots are ~700 px wide; more vertices than this are invisible but still cost Agg time.
+_MAX_PLOT_POINTS = 3200
+
+# One Agg figure per thread, reused across plots (pyplot's global state is
+# neither cheap nor thread-safe, and the web app renders from worker threads).
+_fig_local = threading.local()
+
+def _figure() -> tuple[Figure, Axes]:
+    fig = getattr(_fig_local, "fig", None)
+    if fig is None:
+        # matplotlib is imported here, not at module scope: it is a slow import and
+        # only rendering needs it (the web app's /share path never does).
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        _fig_local.fig = fig
+        _fig_local.ax = fig.add_subplot()
+    return fig, _fig_local.ax
+
+# Lazily created, shared by every caller of plot_segments. "spawn" because the
+# web app calls in from worker threads, where forking is unsafe.
+_plot_pool: ProcessPoolExecutor | None = None
+_plot_pool_lock = threading.Lock()
+
+def _get_plot_pool() -> ProcessPoolExecutor:
+    global _plot_pool
+    with _plot_pool_lock:
+        if _plot_pool is None:
+            _plot_pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return _plot_pool
+
+def _discard_plot_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a pool whose worker died (OOM kill, crash in Agg) so the next call starts a fresh one."""
+    global _plot_pool
+    with _plot_pool_lock:
+        if _plot_pool is pool:
+            _plot_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
 @dataclass
 class SegmentReport:
     segment: Segment
@@ -48,83 +99,124 @@ def print_reports(df: pd.DataFrame, reports: list[SegmentReport]) -> None:
                 for step in c.next_steps[:3]:
                     print(f"     - {step}")
 
-def export_json(reports: list[SegmentReport], outpath: str) -> None:
-    def ser(obj):
-        if hasattr(obj, "__dict__"):
-            return obj.__dict__
-        return str(obj)
-    payload = []
-    for r in reports:
-        payload.append({
-            "segment": {"kind": r.segment.kind, "start_idx": r.segment.start_idx, "end_idx": r.segment.end_idx},
-            "findings": [f.__dict__ for f in r.findings],
-            "ranked_causes": [c.__dict__ for c in (r.ranked_causes or [])],
-        })
-    with open(outpath, "w") as f:
-        json.dump(payload, f, indent=2, default=ser)
+def export_json(reports: list[SegmentReport], outpath: str, gzip_over: int | None = None) -> str:
+    """
+    Write compact JSON (indented if LOGTOOL_PRETTY_JSON is set).
+    If gzip_over is given and the payload is larger, write outpath + ".gz" instead.
+    Returns the path written.
+    """
+    # Segment, Finding and RankedCause are dataclasses; orjson serializes them natively.
+    payload = [
+        {"segment": r.segment, "findings": r.findings, "ranked_causes": r.ranked_causes or []}
+        for r in reports
+    ]
+    option = orjson.OPT_SERIALIZE_NUMPY
+    if os.environ.get("LOGTOOL_PRETTY_JSON"):
+        option |= orjson.OPT_INDENT_2
+    buf = orjson.dumps(payload, option=option)
+    if gzip_over is not None and len(buf) > gzip_over:
+        buf = gzip.compress(buf)
+        outpath += ".gz"
+    with open(outpath, "wb") as f:
+        f.write(buf)
+    return outpath
+
+def segment_arrays(seg_df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """
+    float32 arrays of the plotted columns, extracted once per segment.
+    Agg draws in float64 regardless; float32 halves what is pickled to plot workers.
+    """
+    return {c: seg_df[c].to_numpy(dtype=np.float32) for c in _PLOT_COLS if c in seg_df.columns}
 
 def plot_segment(seg_df: pd.DataFrame, outbase: str) -> None:
-    # Boost overlay
-    if {"time_s","boost_actual_psi","boost_target_psi"}.issubset(seg_df.columns):
-        plt.figure()
-        plt.plot(seg_df["time_s"], seg_df["boost_target_psi"], label="Boost Target (psi)")
-        plt.plot(seg_df["time_s"], seg_df["boost_actual_psi"], label="Boost Actual (psi)")
-        plt.xlabel("Time (s)")
-        plt.ylabel("Boost (psi)")
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(outbase.replace(".png", "_boost.png"), dpi=160)
-        plt.close()
-
-    # EMP overlay
-    if {"time_s","emp_psi","boost_actual_psi"}.issubset(seg_df.columns):
-        plt.figure()
-        plt.plot(seg_df["time_s"], seg_df["emp_psi"], label="Exhaust Manifold Pressure (psi)")
-        plt.plot(seg_df["time_s"], seg_df["boost_actual_psi"], label="Boost Actual (psi)")
-        plt.xlabel("Time (s)")
-        plt.ylabel("Pressure (psi)")
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(outbase.replace(".png", "_emp_boost.png"), dpi=160)
-        plt.close()
-
-    # EMP:Boost ratio by RPM (if present)
-    if {"rpm","emp_psi","boost_actual_psi"}.issubset(seg_df.columns):
-        rpm = pd.to_numeric(seg_df["rpm"], errors="coerce").to_numpy(dtype=float)
-        emp = pd.to_numeric(seg_df["emp_psi"], errors="coerce").to_numpy(dtype=float)
-        bst = pd.to_numeric(seg_df["boost_actual_psi"], errors="coerce").to_numpy(dtype=float)
-        m = (bst > 2.0) & np.isfinite(rpm) & np.isfinite(emp) & np.isfinite(bst)
-        if np.sum(m) > 20:
-            ratio = emp[m] / bst[m]
-            plt.figure()
-            plt.plot(rpm[m], ratio, label="EMP/Boost (gauge)")
-            plt.xlabel("RPM")
-            plt.ylabel("Ratio")
-            plt.legend()
-            plt.tight_layout()
-            plt.savefig(outbase.replace(".png", "_emp_ratio_vs_rpm.png"), dpi=160)
-            plt.close()
-
-    # FRP overlay
-    if {"time_s","frp_actual_psi","frp_target_psi"}.issubset(seg_df.columns):
-        plt.figure()
-        plt.plot(seg_df["time_s"], seg_df["frp_target_psi"], label="FRP Target (psi)")
-        plt.plot(seg_df["time_s"], seg_df["frp_actual_psi"], label="FRP Actual (psi)")
-        plt.xlabel("Time (s)")
-        plt.ylabel("Fuel Rail Pressure (psi)")
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(outbase.replace(".png", "_frp.png"), dpi=160)
-        plt.close()
-
-    # Throttle & pedal
-    if {"time_s","app_pct","throttle_pct"}.issubset(seg_df.columns):
-        plt.figure()
-        plt.plot(seg_df["time_s"], seg_df["app_pct"], label="Pedal (%)")
-        plt.plot(seg_df["time_s"], seg_df["throttle_pct"], label="Throttle (%)")
-        plt.xlabel("Time (s)")
-        plt.ylabel("Percent")
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(outbase.replace(".png", "_throttle.png"), dpi=160)
-        plt.close()
+    _render_one(segment_arrays(seg_df), outbase)
+
+def plot_segments(df: pd.DataFrame, segments: list[Segment], outbases: list[str]) -> None:
+    """Plot many segments, farming them out to worker processes when there is more than one."""
+    jobs = [(segment_arrays(slice_segment(df, seg)), outbase) for seg, outbase in zip(segments, outbases)]
+    if not jobs:
+        return
+    if len(jobs) == 1:
+        _render_one(*jobs[0])
+        return
+    # A broken pool fails every submit; replace it and retry once, then render here.
+    for _ in range(2):
+        pool = _get_plot_pool()
+        try:
+            for fut in as_completed([pool.submit(_render_one, cols, outbase) for cols, outbase in jobs]):
+                fut.result()
+            return
+        except BrokenProcessPool:
+            _discard_plot_pool(pool)
+    for cols, outbase in jobs:
+        _render_one(cols, outbase)
+
+def _downsample(x: np.ndarray, y: np.ndarray, n_out: int = _MAX_PLOT_POINTS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Min/max decimation: split the series into n_out//2 buckets and keep each bucket's
+    min and max (at the bucket's first/last x), so spikes survive the reduction.
+    """
+    n = len(x)
+    if n <= n_out:
+        return x, y
+    starts = np.linspace(0, n, n_out // 2, endpoint=False).astype(np.intp)
+    ends = np.append(starts[1:], n) - 1
+    xs = np.empty(2 * len(starts), dtype=x.dtype)
+    ys = np.empty(2 * len(starts), dtype=y.dtype)
+    xs[0::2], xs[1::2] = x[starts], x[ends]
+    ys[0::2], ys[1::2] = np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+    return xs, ys
+
+def _vs_time(*series: tuple[str, str]):
+    """Series builder for plain overlays: each (column, label) against time_s."""
+    return lambda cols: [(cols["time_s"], cols[c], label) for c, label in series]
+
+def _emp_ratio_series(cols: dict[str, np.ndarray]) -> list:
+    rpm, emp, bst = cols["rpm"], cols["emp_psi"], cols["boost_actual_psi"]
+    # NaN in any term makes the sum NaN, so one isfinite covers all three
+    m = (bst > 2.0) & np.isfinite(rpm + emp + bst)
+    if np.count_nonzero(m) <= 20:
+        return []
+    ratio = np.divide(emp, bst, out=np.empty_like(emp), where=m)
+    return [(rpm[m], ratio[m], "EMP/Boost (gauge)")]
+
+# (file suffix, required columns, series builder, x label, y label)
+_PLOT_SPECS = [
+    ("_boost.png", ("time_s", "boost_target_psi", "boost_actual_psi"),
+     _vs_time(("boost_target_psi", "Boost Target (psi)"), ("boost_actual_psi", "Boost Actual (psi)")),
+     "Time (s)", "Boost (psi)"),
+    ("_emp_boost.png", ("time_s", "emp_psi", "boost_actual_psi"),
+     _vs_time(("emp_psi", "Exhaust Manifold Pressure (psi)"), ("boost_actual_psi", "Boost Actual (psi)")),
+     "Time (s)", "Pressure (psi)"),
+    ("_emp_ratio_vs_rpm.png", ("rpm", "emp_psi", "boost_actual_psi"),
+     _emp_ratio_series,
+     "RPM", "Ratio"),
+    ("_frp.png", ("time_s", "frp_target_psi", "frp_actual_psi"),
+     _vs_time(("frp_target_psi", "FRP Target (psi)"), ("frp_actual_psi", "FRP Actual (psi)")),
+     "Time (s)", "Fuel Rail Pressure (psi)"),
+    ("_throttle.png", ("time_s", "app_pct", "throttle_pct"),
+     _vs_time(("app_pct", "Pedal (%)"), ("throttle_pct", "Throttle (%)")),
+     "Time (s)", "Percent"),
+]
+
+# Suffixes plot_segment may append to outbase, in render order.
+PLOT_SUFFIXES = [spec[0] for spec in _PLOT_SPECS]
+
+# Columns the plots draw from; only these are shipped to plot workers.
+_PLOT_COLS = tuple(dict.fromkeys(c for spec in _PLOT_SPECS for c in spec[1]))
+
+def _render_one(cols: dict[str, np.ndarray], outbase: str) -> None:
+    fig, ax = _figure()
+    for suffix, required, build, xlabel, ylabel in _PLOT_SPECS:
+        if not set(required).issubset(cols):
+            continue
+        series = build(cols)
+        if not series:
+            continue
+        ax.cla()
+        for x, y, label in series:
+            ax.plot(*_downsample(x, y), label=label)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.legend()
+        fig.savefig(outbase.replace(".png", suffix), dpi=PLOT_DPI)
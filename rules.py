@@ -3,7 +3,7 @@ from dataclasses import dataclass
 import numpy as np
 import pandas as pd
 
-@dataclass
+@dataclass(slots=True)
 class Finding:
     code: str
     severity: str  # "info" | "warn" | "fail"
@@ -12,24 +12,85 @@ class Finding:
     evidence: dict
 
 def _pct(cond: np.ndarray) -> float:
-    return float(np.mean(cond) * 100.0) if len(cond) else 0.0
+    # count_nonzero skips mean()'s float cast of the mask; same (count / n) * 100 rounding
+    return float(np.count_nonzero(cond) / cond.size * 100.0) if cond.size else 0.0
 
-def _safe_np(a):
-    return np.asarray(a, dtype=float)
+def _nanmin(a: np.ndarray) -> float:
+    """np.nanmin(a), via the plain min reduction unless a actually contains NaN (min then returns NaN)."""
+    m = a.min()
+    return np.nanmin(a) if np.isnan(m) else m
+
+def _pctl(a: np.ndarray, *qs: float):
+    """
+    np.nanpercentile(a, q) for each q (default "linear" method) from a single np.partition
+    of the non-NaN values. Returns a float for one q, else a tuple in the order given.
+    """
+    a = a[~np.isnan(a)]
+    n = a.size
+    if n == 0:
+        out = tuple(float("nan") for _ in qs)
+    else:
+        pos = [(n - 1) * (q / 100) for q in qs]
+        lo = [min(int(p), n - 1) for p in pos]
+        hi = [min(i + 1, n - 1) for i in lo]
+        part = np.partition(a, sorted(set(lo + hi)))
+        vals = []
+        for p, i, j in zip(pos, lo, hi):
+            x, y, g = part[i], part[j], p - i
+            # same lerp as numpy: approach from whichever neighbour is closer
+            d = y - x
+            vals.append(float(y - d * (1 - g) if g >= 0.5 else x + d * g))
+        out = tuple(vals)
+    return out[0] if len(out) == 1 else out
+
+def _sign_changes(x: np.ndarray) -> int:
+    """
+    Count of i where sign(d[i]) != sign(d[i-1]) for d = np.diff(x, prepend=x[0]), from one diff
+    with no prepend copy. Zero steps count as their own sign and NaN never matches, as before.
+    """
+    if x.size < 2:
+        return 0
+    s = np.diff(x)
+    np.sign(s, out=s)
+    lead = np.sign(x[0] - x[0])  # the prepended step: 0, or NaN when x[0] is not finite
+    return int(np.count_nonzero(s[1:] != s[:-1])) + int(s[0] != lead)
+
+# Columns run_wot_rules reads; pulled out of the segment once as float64 arrays.
+_WOT_COLS = (
+    "time_s", "app_pct", "throttle_pct", "boost_actual_psi", "boost_target_psi", "turbo_comp_protect_psi",
+    "wg_pos_act", "rpm", "emp_psi", "baro_psi", "frp_actual_psi", "frp_target_psi",
+    "hpfp_spill_final", "afr_actual", "afr_cmd", "aircharge_pct", "aircharge_des_pct",
+    "kr_cyl1", "kr_cyl2", "kr_cyl3", "kr_cyl4",
+)
+
+def _columns(seg: pd.DataFrame, names) -> dict[str, np.ndarray]:
+    """float64 views (no copy when the column is already float64) of the named columns present in seg."""
+    present = set(seg.columns)
+    return {c: seg[c].to_numpy(dtype=np.float64, copy=False) for c in names if c in present}
 
 def infer_wg_polarity(seg: pd.DataFrame) -> str:
     """
     Best-effort guess:
     If wg_pos increases when boost error increases, likely 'higher = more open' (more opening -> less boost).
     """
+    return _wg_polarity(_columns(seg, ("wg_pos_act", "boost_actual_psi", "boost_target_psi")))
+
+def _wg_polarity(cols: dict[str, np.ndarray]) -> str:
     need = {"wg_pos_act","boost_actual_psi","boost_target_psi"}
-    if not need.issubset(seg.columns):
+    if not need.issubset(cols):
+        return "unknown"
+    wg = cols["wg_pos_act"]
+    n = wg.size
+    if n < 2:
         return "unknown"
-    wg = _safe_np(seg["wg_pos_act"])
-    err = _safe_np(seg["boost_target_psi"] - seg["boost_actual_psi"])
-    if np.std(wg) < 1e-6 or np.std(err) < 1e-6:
+    # Pearson r from centered dot products; the stds fall out of the same sums
+    wg = wg - wg.mean()
+    err = cols["boost_target_psi"] - cols["boost_actual_psi"]
+    err -= err.mean()
+    sww, see = float(wg @ wg), float(err @ err)
+    if np.sqrt(sww / n) < 1e-6 or np.sqrt(see / n) < 1e-6:
         return "unknown"
-    corr = float(np.corrcoef(wg, err)[0, 1])
+    corr = float(wg @ err) / np.sqrt(sww * see)
     if corr > 0.2:
         return "higher=more_open"
     if corr < -0.2:
@@ -43,19 +104,7 @@ def emp_boost_ratio(seg: pd.DataFrame) -> tuple[float|None, float|None]:
     - absolute ratio: (EMP_g+baro)/(Boost_g+baro) when baro exists
     Returns (gauge_ratio_median, abs_ratio_median)
     """
-    if not {"emp_psi","boost_actual_psi"}.issubset(seg.columns):
-        return (None, None)
-    emp = _safe_np(seg["emp_psi"])
-    bst = _safe_np(seg["boost_actual_psi"])
-    mask = bst > 2.0
-    if not np.any(mask):
-        return (None, None)
-    gr = float(np.nanmedian(emp[mask] / bst[mask]))
-
-    ar = None
-    if "baro_psi" in seg.columns:
-        baro = _safe_np(seg["baro_psi"])
-        ar = float(np.nanmedian((emp[mask] + baro[mask]) / (bst[mask] + baro[mask])))
+    gr, ar, _ = _emp_ratios(_columns(seg, ("emp_psi", "boost_actual_psi", "baro_psi")))
     return (gr, ar)
 
 def emp_ratio_by_rpm(seg: pd.DataFrame, bins: list[int] | None = None) -> list[dict]:
@@ -63,39 +112,68 @@ def emp_ratio_by_rpm(seg: pd.DataFrame, bins: list[int] | None = None) -> list[d
     Bin EMP:Boost ratio by RPM to show where the turbine starts choking.
     Returns list of dicts: [{"rpm_lo":..., "rpm_hi":..., "ratio_g_median":..., "ratio_abs_median":..., "n":...}, ...]
     """
+    return _emp_ratios(_columns(seg, ("rpm", "emp_psi", "boost_actual_psi", "baro_psi")), bins)[2]
+
+def _emp_ratios(cols: dict[str, np.ndarray], bins: list[int] | None = None) -> tuple[float|None, float|None, list[dict]]:
+    """
+    emp_boost_ratio and emp_ratio_by_rpm in one sweep: the boosted-sample ratios are built once
+    and feed both the overall medians and the per-bin medians (bins need "rpm" as well).
+    """
     if bins is None:
         bins = [2500, 3000, 3500, 4000, 4500, 5000, 5500, 6000, 6500, 7000]
 
-    req = {"rpm","emp_psi","boost_actual_psi"}
-    if not req.issubset(seg.columns):
-        return []
+    if not {"emp_psi","boost_actual_psi"}.issubset(cols):
+        return (None, None, [])
+    bst = cols["boost_actual_psi"]
+    idx = np.flatnonzero(bst > 2.0)
+    if not idx.size:
+        return (None, None, [])
+
+    e, b = cols["emp_psi"][idx], bst[idx]
+    ratio_g = e / b
+    ratio_a = None
+    if "baro_psi" in cols:
+        baro = cols["baro_psi"][idx]
+        ratio_a = (e + baro) / (b + baro)
+    gr = float(np.nanmedian(ratio_g))
+    ar = float(np.nanmedian(ratio_a)) if ratio_a is not None else None
+
+    if "rpm" not in cols:
+        return (gr, ar, [])
 
-    rpm = _safe_np(seg["rpm"])
-    emp = _safe_np(seg["emp_psi"])
-    bst = _safe_np(seg["boost_actual_psi"])
-    baro = _safe_np(seg["baro_psi"]) if "baro_psi" in seg.columns else None
+    # Group boosted samples by RPM bin with one sort instead of a mask per bin.
+    # digitize puts rpm < bins[0] at -1 and rpm >= bins[-1] (or NaN) at len(bins)-1,
+    # so only ids 0..len(bins)-2 are reported, matching lo <= rpm < hi.
+    bid = np.digitize(cols["rpm"][idx], bins) - 1
+    order = np.argsort(bid, kind="stable")
+    edges = np.searchsorted(bid[order], np.arange(len(bins)))
+    counts = np.diff(edges)
+    ratio_g = ratio_g[order]
+    if ratio_a is not None:
+        ratio_a = ratio_a[order]
 
     out = []
-    for lo, hi in zip(bins[:-1], bins[1:]):
-        m = (rpm >= lo) & (rpm < hi) & (bst > 2.0)
-        n = int(np.sum(m))
+    for i, (lo, hi) in enumerate(zip(bins[:-1], bins[1:])):
+        n = int(counts[i])
         if n < 8:
             continue
-        g = float(np.nanmedian(emp[m] / bst[m]))
+        sl = slice(edges[i], edges[i + 1])
+        g = float(np.nanmedian(ratio_g[sl]))
         a = None
-        if baro is not None:
-            a = float(np.nanmedian((emp[m] + baro[m]) / (bst[m] + baro[m])))
+        if ratio_a is not None:
+            a = float(np.nanmedian(ratio_a[sl]))
         out.append({"rpm_lo": int(lo), "rpm_hi": int(hi), "ratio_g_median": g, "ratio_abs_median": a, "n": n})
-    return out
+    return (gr, ar, out)
 
 def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
     f: list[Finding] = []
-    wgpol = infer_wg_polarity(seg)
+    cols = _columns(seg, _WOT_COLS)
+    wgpol = _wg_polarity(cols)
 
     # ---- Throttle closure / torque limiting ----
-    if {"app_pct","throttle_pct"}.issubset(seg.columns):
-        app = _safe_np(seg["app_pct"])
-        thr = _safe_np(seg["throttle_pct"])
+    if {"app_pct","throttle_pct"}.issubset(cols):
+        app = cols["app_pct"]
+        thr = cols["throttle_pct"]
         closure = (app >= 95) & (thr < 90)
         pct = _pct(closure)
         thr_min = float(np.nanmin(thr))
@@ -118,18 +196,16 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
 
     # ---- Boost tracking ----
     underboost = False
-    if {"boost_actual_psi","boost_target_psi","time_s"}.issubset(seg.columns):
-        tgt = _safe_np(seg["boost_target_psi"])
-        act = _safe_np(seg["boost_actual_psi"])
+    if {"boost_actual_psi","boost_target_psi","time_s"}.issubset(cols):
+        tgt = cols["boost_target_psi"]
+        act = cols["boost_actual_psi"]
         err = tgt - act
         max_tgt = float(np.nanmax(tgt))
         max_act = float(np.nanmax(act))
         mean_err = float(np.nanmean(err))
-        p90_err = float(np.nanpercentile(err, 90))
-        p10_err = float(np.nanpercentile(err, 10))
+        p90_err, p10_err = _pctl(err, 90, 10)
 
-        derr = np.diff(err, prepend=err[0])
-        sign_changes = np.sum(np.sign(derr[1:]) != np.sign(derr[:-1]))
+        sign_changes = _sign_changes(err)
         osc_rate = float(sign_changes / max(1, len(err)-1))
 
         if p90_err > 2.0:
@@ -156,10 +232,10 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
             ))
 
     # ---- Component protection limiting ----
-    if {"turbo_comp_protect_psi","boost_target_psi","boost_actual_psi"}.issubset(seg.columns):
-        protect = _safe_np(seg["turbo_comp_protect_psi"])
-        tgt = _safe_np(seg["boost_target_psi"])
-        act = _safe_np(seg["boost_actual_psi"])
+    if {"turbo_comp_protect_psi","boost_target_psi","boost_actual_psi"}.issubset(cols):
+        protect = cols["turbo_comp_protect_psi"]
+        tgt = cols["boost_target_psi"]
+        act = cols["boost_actual_psi"]
         limiting = protect < (tgt - 0.8)
         pct_lim = _pct(limiting)
         if pct_lim > 5:
@@ -175,12 +251,11 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
             ))
 
     # ---- Wastegate position saturation hints ----
-    if "wg_pos_act" in seg.columns:
-        wg = _safe_np(seg["wg_pos_act"])
+    if "wg_pos_act" in cols:
+        wg = cols["wg_pos_act"]
         wg_min = float(np.nanmin(wg))
         wg_max = float(np.nanmax(wg))
-        p5 = float(np.nanpercentile(wg, 5))
-        p95 = float(np.nanpercentile(wg, 95))
+        p5, p95 = _pctl(wg, 5, 95)
         f.append(Finding(
             code="WG_RANGE",
             severity="info",
@@ -212,7 +287,7 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
                 ))
 
     # ---- EMP : Boost ratio (overall + by RPM bins) ----
-    gr, ar = emp_boost_ratio(seg)
+    gr, ar, binned = _emp_ratios(cols)
     if gr is not None:
         sev = "info"
         if gr > 2.5:
@@ -231,7 +306,6 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
             evidence={"emp_boost_gauge_ratio_median": gr, "emp_boost_abs_ratio_median": ar}
         ))
 
-        binned = emp_ratio_by_rpm(seg)
         if binned:
             # Flag if ratio rises materially with RPM (simple: last bin - first bin)
             first = binned[0]["ratio_g_median"]
@@ -249,9 +323,9 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
             ))
 
     # ---- Fuel rail tracking + HPFP spill context ----
-    if {"frp_actual_psi","frp_target_psi"}.issubset(seg.columns):
-        tgt = _safe_np(seg["frp_target_psi"])
-        act = _safe_np(seg["frp_actual_psi"])
+    if {"frp_actual_psi","frp_target_psi"}.issubset(cols):
+        tgt = cols["frp_target_psi"]
+        act = cols["frp_actual_psi"]
         err = tgt - act
         max_drop = float(np.nanmax(err))
         min_act = float(np.nanmin(act))
@@ -272,9 +346,9 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
                 detail=f"Max FRP shortfall {max_drop:.0f} psi (min actual {min_act:.0f} psi).",
                 evidence={"max_shortfall_psi": max_drop, "min_frp_actual_psi": min_act}
             ))
-        if {"hpfp_spill_final"}.issubset(seg.columns):
-            spill = _safe_np(seg["hpfp_spill_final"])
-            p95_spill = float(np.nanpercentile(spill, 95))
+        if {"hpfp_spill_final"}.issubset(cols):
+            spill = cols["hpfp_spill_final"]
+            p95_spill = _pctl(spill, 95)
             hi = spill >= p95_spill
             pct_hi = _pct(hi)
             if max_drop > 300 and pct_hi > 25:
@@ -287,12 +361,12 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
                 ))
 
     # ---- AFR tracking ----
-    if {"afr_actual","afr_cmd"}.issubset(seg.columns):
-        act = _safe_np(seg["afr_actual"])
-        cmd = _safe_np(seg["afr_cmd"])
+    if {"afr_actual","afr_cmd"}.issubset(cols):
+        act = cols["afr_actual"]
+        cmd = cols["afr_cmd"]
         err = act - cmd
         mean_abs = float(np.nanmean(np.abs(err)))
-        lean_p90 = float(np.nanpercentile(err, 90))
+        lean_p90 = _pctl(err, 90)
         if mean_abs > 0.5 or lean_p90 > 0.8:
             f.append(Finding(
                 code="AFR_MISS",
@@ -311,10 +385,10 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
             ))
 
     # ---- Knock ----
-    kr_cols = [c for c in ["kr_cyl1","kr_cyl2","kr_cyl3","kr_cyl4"] if c in seg.columns]
+    kr_cols = [c for c in ["kr_cyl1","kr_cyl2","kr_cyl3","kr_cyl4"] if c in cols]
     if kr_cols:
-        kr = seg[kr_cols].to_numpy(dtype=float)
-        worst = float(np.nanmin(kr))  # assuming retard is negative
+        # per-cylinder reductions on the column arrays; no (N, 4) copy
+        worst = float(np.nanmin([_nanmin(cols[c]) for c in kr_cols]))  # assuming retard is negative
         if abs(worst) >= 4.0:
             sev = "fail"
         elif abs(worst) >= 2.0:
@@ -330,9 +404,9 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
         ))
 
     # ---- Aircharge cap / load limiting hint ----
-    if {"aircharge_pct","aircharge_des_pct"}.issubset(seg.columns):
-        ac = _safe_np(seg["aircharge_pct"])
-        acd = _safe_np(seg["aircharge_des_pct"])
+    if {"aircharge_pct","aircharge_des_pct"}.issubset(cols):
+        ac = cols["aircharge_pct"]
+        acd = cols["aircharge_des_pct"]
         diff = acd - ac
         pct = _pct(diff > 5.0)
         if pct > 30:
@@ -341,19 +415,20 @@ def run_wot_rules(seg: pd.DataFrame) -> list[Finding]:
                 severity="warn",
                 title="Air Charge not meeting desired",
                 detail=f"Air Charge Desired exceeded Actual by >5% for {pct:.1f}% of pull. Can indicate airflow limitation or limiting strategy.",
-                evidence={"pct_des_gt_act_5": pct, "diff_p90": float(np.nanpercentile(diff, 90))}
+                evidence={"pct_des_gt_act_5": pct, "diff_p90": _pctl(diff, 90)}
             ))
     return f
 
 def run_cruise_rules(seg: pd.DataFrame) -> list[Finding]:
     f: list[Finding] = []
-    if {"stft_pct","ltft_pct"}.issubset(seg.columns):
-        st = _safe_np(seg["stft_pct"])
-        lt = _safe_np(seg["ltft_pct"])
+    cols = _columns(seg, ("stft_pct", "ltft_pct", "afr_actual"))
+    if {"stft_pct","ltft_pct"}.issubset(cols):
+        st = cols["stft_pct"]
+        lt = cols["ltft_pct"]
         st_med = float(np.nanmedian(st))
         lt_med = float(np.nanmedian(lt))
-        st_abs_p90 = float(np.nanpercentile(np.abs(st), 90))
-        lt_abs_p90 = float(np.nanpercentile(np.abs(lt), 90))
+        st_abs_p90 = _pctl(np.abs(st), 90)
+        lt_abs_p90 = _pctl(np.abs(lt), 90)
         sev = "info"
         if st_abs_p90 > 10 or lt_abs_p90 > 10:
             sev = "warn"
@@ -366,8 +441,8 @@ def run_cruise_rules(seg: pd.DataFrame) -> list[Finding]:
             detail=f"STFT median {st_med:.1f}% (|p90| {st_abs_p90:.1f}%), LTFT median {lt_med:.1f}% (|p90| {lt_abs_p90:.1f}%). High trims suggest intake/evap leaks, MAF scaling, or injector scaling.",
             evidence={"stft_median": st_med, "stft_abs_p90": st_abs_p90, "ltft_median": lt_med, "ltft_abs_p90": lt_abs_p90}
         ))
-    if {"afr_actual"}.issubset(seg.columns):
-        afr = _safe_np(seg["afr_actual"])
+    if "afr_actual" in cols:
+        afr = cols["afr_actual"]
         afr_std = float(np.nanstd(afr))
         if afr_std > 0.6:
             f.append(Finding(
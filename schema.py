@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 import re
+from typing import Iterable
 import pandas as pd
 
 # ---- Canonical column names used internally ----
@@ -78,39 +79,64 @@ class MappingResult:
     mapped: dict
     missing: list
 
+_WS = re.compile(r"\s+")
+
 def _normalize_header(s: str) -> str:
     # collapse whitespace and strip
-    s = re.sub(r"\s+", " ", str(s)).strip()
+    s = _WS.sub(" ", str(s)).strip()
     return s
 
-def load_log(path: str) -> pd.DataFrame:
-    """Load CSV or XLSX."""
+def _read_csv(path: str, usecols: list | None) -> pd.DataFrame:
+    try:
+        return pd.read_csv(path, engine="pyarrow", usecols=usecols)
+    except (ImportError, ValueError):
+        # pyarrow not installed, or a file its stricter parser rejects
+        return pd.read_csv(path, usecols=usecols)
+
+def _read_excel(path: str, usecols) -> pd.DataFrame:
+    try:
+        return pd.read_excel(path, engine="calamine", usecols=usecols)
+    except (ImportError, ValueError):
+        # python-calamine not installed (or pandas too old to know the engine)
+        return pd.read_excel(path, usecols=usecols)
+
+def load_log(path: str, columns: Iterable[str] | None = None) -> pd.DataFrame:
+    """
+    Load CSV or XLSX.
+    If columns (raw header names, e.g. FK8_COBB_MAP keys) is given, only headers
+    matching them after normalization are read; Cobb logs are often much wider.
+    """
+    wanted = {_normalize_header(c) for c in columns} if columns is not None else None
     if path.lower().endswith(".csv"):
-        return pd.read_csv(path)
+        usecols = None
+        if wanted is not None:
+            header = pd.read_csv(path, nrows=0).columns
+            usecols = [c for c in header if _normalize_header(c) in wanted] or None
+        return _read_csv(path, usecols)
     if path.lower().endswith((".xlsx", ".xls")):
-        return pd.read_excel(path)
+        usecols = (lambda c: _normalize_header(c) in wanted) if wanted is not None else None
+        return _read_excel(path, usecols)
     raise ValueError(f"Unsupported file type: {path}")
 
 def map_columns(df: pd.DataFrame, mapping: dict = FK8_COBB_MAP) -> MappingResult:
     """Map platform columns to canonical names. Keeps only mapped columns."""
     cols = {_normalize_header(c): c for c in df.columns}
-    mapped = {}
-    out = pd.DataFrame()
-
-    for raw_name, canon in mapping.items():
-        key = _normalize_header(raw_name)
-        if key in cols:
-            out[canon] = df[cols[key]]
-            mapped[raw_name] = canon
+    keys = {raw_name: _normalize_header(raw_name) for raw_name in mapping}
+    mapped = {raw_name: mapping[raw_name] for raw_name, key in keys.items() if key in cols}
+    missing = [raw_name for raw_name, key in keys.items() if key not in cols]
 
-    missing = [k for k in mapping.keys() if _normalize_header(k) not in cols]
+    # one constructor call instead of growing the frame column by column
+    data = {canon: df[cols[keys[raw_name]]] for raw_name, canon in mapped.items()}
+    out = pd.DataFrame(data, copy=False) if data else pd.DataFrame()
     return MappingResult(df=out, mapped=mapped, missing=missing)
 
 def basic_cleanup(df: pd.DataFrame) -> pd.DataFrame:
     """Coerce numeric columns; drop rows with no time/rpm."""
-    out = df.copy()
-    for c in out.columns:
-        out[c] = pd.to_numeric(out[c], errors="coerce")
+    # numeric columns would come back from to_numeric unchanged; only coerce the rest,
+    # and let assign() share the untouched columns instead of deep-copying the frame
+    coerced = {c: pd.to_numeric(df[c], errors="coerce")
+               for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])}
+    out = df.assign(**coerced) if coerced else df
     out = out.dropna(subset=["time_s", "rpm"])
     out = out.sort_values("time_s").reset_index(drop=True)
     return out
@@ -10,19 +10,42 @@ class Segment:
     end_idx: int
 
 def _rpm_slope(time_s: np.ndarray, rpm: np.ndarray) -> np.ndarray:
-    dt = np.diff(time_s, prepend=time_s[0])
-    dr = np.diff(rpm, prepend=rpm[0])
-    slope = np.divide(dr, np.where(dt == 0, np.nan, dt))
-    return np.nan_to_num(slope, nan=0.0)
+    # first sample and zero-dt steps stay 0; divide straight into the output buffer
+    slope = np.zeros(len(time_s))
+    if slope.size > 1:
+        dt = np.diff(time_s)
+        np.divide(np.diff(rpm), dt, out=slope[1:], where=dt != 0)
+        np.nan_to_num(slope, copy=False, nan=0.0)
+    return slope
+
+def rpm_slope(df: pd.DataFrame) -> np.ndarray:
+    """
+    Per-sample RPM slope (rpm/sec) of df. Both detectors need it; compute it once and
+    pass it as slope= when running them on the same frame.
+    """
+    return _rpm_slope(df["time_s"].to_numpy(), df["rpm"].to_numpy())
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Locate runs of True in mask via edge detection.
+    Returns (starts, ends) where end is the first sample after the run, clipped
+    to the last sample (segments have always included that closing sample).
+    """
+    d = np.diff(mask.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(d == 1)
+    ends = np.minimum(np.flatnonzero(d == -1), len(mask) - 1)
+    return starts, ends
 
 def detect_wot_pulls(df: pd.DataFrame,
                      app_thresh: float = 95.0,
                      min_rpm_slope: float = 50.0,
-                     min_duration_s: float = 1.5) -> list[Segment]:
+                     min_duration_s: float = 1.5,
+                     slope: np.ndarray | None = None) -> list[Segment]:
     """
     Detect WOT pulls using pedal position and rising RPM.
     - app_pct > app_thresh
     - rpm slope > min_rpm_slope (rpm/sec)
+    slope: precomputed rpm_slope(df), computed here if not given.
     """
     if not {"time_s","rpm","app_pct"}.issubset(df.columns):
         return []
@@ -31,36 +54,29 @@ def detect_wot_pulls(df: pd.DataFrame,
     rpm = df["rpm"].to_numpy()
     app = df["app_pct"].to_numpy()
 
-    slope = _rpm_slope(t, rpm)
+    if slope is None:
+        slope = _rpm_slope(t, rpm)
     is_wot = (app >= app_thresh) & (slope >= min_rpm_slope)
 
-    segs: list[Segment] = []
-    in_seg = False
-    s = 0
-    for i, flag in enumerate(is_wot):
-        if flag and not in_seg:
-            in_seg = True
-            s = i
-        if in_seg and (not flag or i == len(is_wot)-1):
-            e = i if not flag else i
-            in_seg = False
-            dur = t[e] - t[s]
-            if dur >= min_duration_s and (rpm[e] - rpm[s]) > 500:
-                segs.append(Segment(kind="WOT_PULL", start_idx=s, end_idx=e))
-    return segs
+    starts, ends = _runs(is_wot)
+    keep = (t[ends] - t[starts] >= min_duration_s) & (rpm[ends] - rpm[starts] > 500)
+    return [Segment(kind="WOT_PULL", start_idx=int(s), end_idx=int(e))
+            for s, e in zip(starts[keep], ends[keep])]
 
 def detect_steady_cruise(df: pd.DataFrame,
                          app_max: float = 20.0,
                          rpm_slope_max: float = 40.0,
                          min_duration_s: float = 10.0,
                          throttle_min: float = 5.0,
-                         throttle_max: float = 40.0) -> list[Segment]:
+                         throttle_max: float = 40.0,
+                         slope: np.ndarray | None = None) -> list[Segment]:
     """
     Detect steady cruise windows for trim/leak diagnosis.
     Heuristic:
       - low pedal
       - near-constant RPM (low rpm slope)
       - moderate throttle (avoid decel fuel cut & idle)
+    slope: precomputed rpm_slope(df), computed here if not given.
     """
     req = {"time_s","rpm","app_pct","throttle_pct"}
     if not req.issubset(df.columns):
@@ -70,24 +86,18 @@ def detect_steady_cruise(df: pd.DataFrame,
     rpm = df["rpm"].to_numpy()
     app = df["app_pct"].to_numpy()
     thr = df["throttle_pct"].to_numpy()
-    slope = np.abs(_rpm_slope(t, rpm))
+    if slope is None:
+        slope = _rpm_slope(t, rpm)
+    slope = np.abs(slope)
 
     steady = (app <= app_max) & (slope <= rpm_slope_max) & (thr >= throttle_min) & (thr <= throttle_max)
 
-    segs: list[Segment] = []
-    in_seg = False
-    s = 0
-    for i, flag in enumerate(steady):
-        if flag and not in_seg:
-            in_seg = True
-            s = i
-        if in_seg and (not flag or i == len(steady)-1):
-            e = i if not flag else i
-            in_seg = False
-            dur = t[e] - t[s]
-            if dur >= min_duration_s:
-                segs.append(Segment(kind="CRUISE", start_idx=s, end_idx=e))
-    return segs
+    starts, ends = _runs(steady)
+    keep = t[ends] - t[starts] >= min_duration_s
+    return [Segment(kind="CRUISE", start_idx=int(s), end_idx=int(e))
+            for s, e in zip(starts[keep], ends[keep])]
 
 def slice_segment(df: pd.DataFrame, seg: Segment) -> pd.DataFrame:
-    return df.iloc[seg.start_idx:seg.end_idx+1].copy()
+    # Row-slice view, no eager copy: rules and plotting only read segments. Copy before
+    # writing to one (pandas < 3 without copy-on-write could write through to df).
+    return df.iloc[seg.start_idx:seg.end_idx+1]